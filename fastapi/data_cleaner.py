@@ -1,143 +1,285 @@
 """
 Data cleaning and simplification functions for GPU monitoring
 """
-from typing import List, Dict, Any
-from pydantic import BaseModel
-
-class SimplifiedGPUData(BaseModel):
-    """Simplified GPU monitoring data"""
-    memory_delta_mb: int
-    utilization_delta_percent: int
-    peak_memory_mb: int
-    peak_utilization_percent: int
-    memory_usage_pattern: str  # "stable", "gradual_increase", "spike"
-
-class SimplifiedRAMData(BaseModel):
-    """Simplified RAM monitoring data"""
-    memory_delta_gb: float
-    peak_usage_gb: float
-    usage_pattern: str  # "stable", "gradual_increase", "spike"
-
-class SimplifiedResponse(BaseModel):
-    """Clean and simplified response for load testing"""
-    response: str
-    model: str
-    
-    # Performance metrics
-    tokens_per_second: float
-    total_tokens: int
-    total_time_seconds: float
-    
-    # Simplified resource data
-    gpu_data: SimplifiedGPUData
-    ram_data: SimplifiedRAMData
-    
-    # Load testing insights
-    bottleneck_type: str  # "vram", "gpu_compute", "ram", "balanced"
-    resource_efficiency: str  # "high", "medium", "low"
-
-def analyze_usage_pattern(usage_samples: List[float], threshold_percent: float = 10) -> str:
+from __future__ import annotations
+
+import sys
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, FrozenSet, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy, numba and pydantic are imported on first use rather than at module
+# import, so scripts that only need part of this module start faster
+
+_MODEL_NAMES = ("SimplifiedGPUData", "SimplifiedRAMData", "SimplifiedResponse")
+
+@lru_cache(maxsize=None)
+def _models() -> Dict[str, type]:
+    """Build the pydantic response models on first use"""
+    from pydantic import BaseModel
+    
+    class SimplifiedGPUData(BaseModel):
+        """Simplified GPU monitoring data"""
+        memory_delta_mb: int
+        utilization_delta_percent: int
+        peak_memory_mb: int
+        peak_utilization_percent: int
+        memory_usage_pattern: str  # "stable", "gradual_increase", "spike"
+    
+    class SimplifiedRAMData(BaseModel):
+        """Simplified RAM monitoring data"""
+        memory_delta_gb: float
+        peak_usage_gb: float
+        usage_pattern: str  # "stable", "gradual_increase", "spike"
+    
+    class SimplifiedResponse(BaseModel):
+        """Clean and simplified response for load testing"""
+        response: str
+        model: str
+        
+        # Performance metrics
+        tokens_per_second: float
+        total_tokens: int
+        total_time_seconds: float
+        
+        # Simplified resource data
+        gpu_data: SimplifiedGPUData
+        ram_data: SimplifiedRAMData
+        
+        # Load testing insights
+        bottleneck_type: str  # "vram", "gpu_compute", "ram", "balanced"
+        resource_efficiency: str  # "high", "medium", "low"
+    
+    models = {
+        "SimplifiedGPUData": SimplifiedGPUData,
+        "SimplifiedRAMData": SimplifiedRAMData,
+        "SimplifiedResponse": SimplifiedResponse,
+    }
+    for name, cls in models.items():
+        # Qualify as module-level classes so pickling and reprs resolve them
+        cls.__qualname__ = name
+    # Later lookups resolve as plain module globals without __getattr__
+    globals().update(models)
+    return models
+
+def __getattr__(name: str):
+    if name in _MODEL_NAMES:
+        return _models()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Shared default for missing nested dicts, avoids a fresh [{}] per lookup
+_EMPTY: Dict[str, Any] = {}
+_EMPTY_SEQ = (_EMPTY,)
+
+# Per-thread sample buffers reused across calls, grown only when a series
+# outgrows them, so steady-state cleaning does not allocate sample arrays
+_TLS = threading.local()
+
+def _scratch(name: str, size: int) -> np.ndarray:
+    """Return a float32 view of `size` elements from a reusable per-thread buffer"""
+    import numpy as np
+    buf = getattr(_TLS, name, None)
+    if buf is None or buf.size < size:
+        buf = np.empty(max(size, 256), dtype=np.float32)
+        setattr(_TLS, name, buf)
+    return buf[:size]
+
+# Pattern codes returned by the compiled kernel, indexed into this tuple
+_PATTERN_LABELS = ("stable", "gradual_increase", "spike", "insufficient_data")
+
+def _analyze_pattern_kernel(samples, threshold):
+    """Single fused pass over a contiguous float32 array, returns a pattern code"""
+    n = samples.shape[0]
+    if n < 3:
+        return 3
+    
+    start_sum = samples[0]
+    end_sum = samples[n - 3]
+    for i in range(1, n):
+        # Two comparisons instead of abs() keeps the loop branch-light
+        d = samples[i] - samples[i - 1]
+        if d > threshold or -d > threshold:
+            return 2
+        if i < 3:
+            start_sum += samples[i]
+        if i > n - 3:
+            end_sum += samples[i]
+    
+    # Both windows hold 3 samples, so comparing sums is comparing averages
+    if end_sum > start_sum * 1.2:
+        return 1
+    return 0
+
+@lru_cache(maxsize=None)
+def _compiled_pattern_kernel():
+    """JIT-compile the pattern kernel on first use, None when numba is unavailable"""
+    try:
+        from numba import njit
+    except ImportError:  # numba is optional, analyze_usage_pattern falls back to NumPy
+        return None
+    import numpy as np
+    
+    kernel = njit(cache=True, fastmath=True)(_analyze_pattern_kernel)
+    # Compile up front for both writable arrays and the read-only ones
+    # rebuilt by the memo cache, so neither triggers a compile mid-request;
+    # analyze_usage_pattern always passes a float threshold to match
+    kernel(np.zeros(4, dtype=np.float32), 1.0)
+    kernel(np.frombuffer(bytes(16), dtype=np.float32), 1.0)
+    return kernel
+
+def prepare_pattern_kernel() -> None:
+    """Compile the pattern kernel now rather than on the first analysis"""
+    _compiled_pattern_kernel()
+
+# Sample-to-sample jumps above these count as spikes
+MEMORY_SPIKE_THRESHOLD_MB = 500.0
+RAM_SPIKE_THRESHOLD_GB = 0.5
+
+# Series longer than this are analyzed directly, hashing them costs more than
+# the analysis itself
+_MEMO_MAX_SAMPLES = 64
+
+def analyze_usage_pattern(usage_samples: Union[Sequence[float], np.ndarray],
+                          threshold_percent: float = 10.0) -> str:
     """Analyze if usage is stable, gradual increase, or spike"""
-    if not usage_samples or len(usage_samples) < 3:
+    import numpy as np
+    samples = np.ascontiguousarray(usage_samples, dtype=np.float32)
+    # An int threshold would make numba compile another specialization
+    threshold_percent = float(threshold_percent)
+    if samples.size > _MEMO_MAX_SAMPLES:
+        return _analyze_uncached(samples, threshold_percent)
+    return _analyze_cached(samples.tobytes(), threshold_percent)
+
+@lru_cache(maxsize=256)
+def _analyze_cached(samples_key: bytes, threshold_percent: float) -> str:
+    """Memoized analysis of short series, keyed by their float32 bytes"""
+    import numpy as np
+    return _analyze_uncached(np.frombuffer(samples_key, dtype=np.float32), threshold_percent)
+
+def _analyze_uncached(samples: np.ndarray, threshold_percent: float) -> str:
+    """Classify a contiguous float32 series"""
+    kernel = _compiled_pattern_kernel()
+    if kernel is not None:
+        return _PATTERN_LABELS[kernel(samples, threshold_percent)]
+    
+    import numpy as np
+    n = samples.size
+    if n < 3:
         return "insufficient_data"
     
-    start_avg = sum(usage_samples[:3]) / 3
-    end_avg = sum(usage_samples[-3:]) / 3
-    max_val = max(usage_samples)
-    min_val = min(usage_samples)
-    
     # Check for spike (sudden jump > threshold)
-    for i in range(1, len(usage_samples)):
-        if abs(usage_samples[i] - usage_samples[i-1]) > threshold_percent:
-            return "spike"
-    
-    # Check for gradual increase
+    diffs = np.abs(np.diff(samples))
+    if diffs.size and diffs.max() > threshold_percent:
+        return "spike"
+    
+    # Check for gradual increase, the windows are fixed at 3 samples
+    inv3 = 1.0 / 3.0
+    start_avg = (samples[0] + samples[1] + samples[2]) * inv3
+    end_avg = (samples[n - 3] + samples[n - 2] + samples[n - 1]) * inv3
     if end_avg > start_avg * 1.2:  # 20% increase
         return "gradual_increase"
     
     # Otherwise stable
     return "stable"
 
+_BOTTLENECK_LABELS = ("balanced", "vram", "gpu_compute", "ram")
+
 def determine_bottleneck(gpu_delta_mb: int, gpu_util_delta: int, ram_delta_gb: float, 
                         total_vram_mb: int) -> str:
     """Determine the primary bottleneck"""
-    vram_usage_percent = (gpu_delta_mb / total_vram_mb) * 100
-    
-    # VRAM bound if using > 70% of available VRAM
-    if vram_usage_percent > 70:
-        return "vram"
-    
-    # GPU compute bound if high utilization but low VRAM
-    if gpu_util_delta > 50 and vram_usage_percent < 50:
-        return "gpu_compute"
-    
-    # RAM bound if significant RAM usage
-    if ram_delta_gb > 2.0:
-        return "ram"
-    
-    return "balanced"
+    # Compare gpu_delta_mb / total_vram_mb * 100 against the thresholds by
+    # cross-multiplying, which keeps the test in integers with no division
+    vram_scaled = gpu_delta_mb * 100
+    total_vram_mb = max(total_vram_mb, 1)
+    
+    idx = (1 if vram_scaled > 70 * total_vram_mb  # VRAM bound if using > 70% of available VRAM
+           else 2 if gpu_util_delta > 50 and vram_scaled < 50 * total_vram_mb  # high utilization, low VRAM
+           else 3 if ram_delta_gb > 2.0  # RAM bound if significant RAM usage
+           else 0)
+    return _BOTTLENECK_LABELS[idx]
+
+_EFFICIENCY_LABELS = ("low", "medium", "high")
 
 def calculate_efficiency(tokens_per_second: float, gpu_util_delta: int) -> str:
     """Calculate resource efficiency based on tokens/second vs GPU usage"""
-    efficiency_ratio = tokens_per_second / max(gpu_util_delta, 1)
-    
-    if efficiency_ratio > 0.5:
-        return "high"
-    elif efficiency_ratio > 0.2:
-        return "medium"
+    # tokens_per_second / util > 0.5 (high) and > 0.2 (medium), multiplied
+    # through so each threshold is one compare and no division is needed
+    util = max(gpu_util_delta, 1)
+    idx = (tokens_per_second * 2 > util) + (tokens_per_second * 5 > util)
+    return _EFFICIENCY_LABELS[idx]
+
+def _extract_metrics(raw_response: Dict[str, Any], with_peaks: bool = True) -> tuple:
+    """Pull the scalar fields used by the simplified response out of a raw response"""
+    get = raw_response.get
+    
+    # Resolve each nested block once; `or` also covers keys present as None/[]
+    resource_delta = get("resource_delta") or _EMPTY
+    gpu_delta = (resource_delta.get("gpu") or _EMPTY_SEQ)[0]
+    ram_delta = resource_delta.get("ram") or _EMPTY
+    peak_gpu = ((get("peak_gpu_usage") or _EMPTY).get("gpus") or _EMPTY_SEQ)[0]
+    
+    if with_peaks:
+        peak_memory_mb = peak_gpu.get("memory_used_mb", 0)
+        peak_utilization_percent = peak_gpu.get("utilization_percent", 0)
+        peak_ram_gb = (get("peak_ram_usage") or _EMPTY).get("used_gb", 0)
     else:
-        return "low"
+        peak_memory_mb = peak_utilization_percent = peak_ram_gb = 0
+    
+    total_time_seconds = get("total_time_seconds")
+    if total_time_seconds is None:
+        # Raw chat data only carries the nanosecond duration
+        total_time_seconds = round((get("total_duration") or 0) / 1_000_000_000, 3)
+    
+    return (get("response", ""), get("model", "unknown"),
+            get("tokens_per_second", 0), get("total_tokens", 0), total_time_seconds,
+            gpu_delta.get("memory_delta_mb", 0), gpu_delta.get("utilization_delta_percent", 0),
+            ram_delta.get("memory_delta_gb", 0),
+            peak_memory_mb, peak_utilization_percent,
+            # total VRAM is always needed for the bottleneck check
+            peak_gpu.get("memory_total_mb", 6144), peak_ram_gb)
 
-def clean_gpu_data(raw_response: Dict[str, Any]) -> SimplifiedResponse:
+def _usage_patterns(raw_response: Dict[str, Any]) -> tuple:
     """
-    Clean and simplify the massive GPU monitoring data
-    Returns only essential metrics for load testing
+    Analyze the GPU memory and RAM patterns from the during-usage samples
+    Responses that only carry usage summaries already include the patterns
     """
+    gpu_during = raw_response.get("gpu_usage_during")
+    if gpu_during is None:
+        gpu_summary = raw_response.get("gpu_usage_summary") or _EMPTY
+        memory_pattern = gpu_summary.get("memory_usage_pattern", "insufficient_data")
+    else:
+        memory_samples = _scratch("memory", len(gpu_during))
+        for i, sample in enumerate(gpu_during):
+            gpus = sample.get("gpus")
+            memory_samples[i] = (gpus[0] if gpus else _EMPTY).get("memory_used_mb", 0)
+        memory_pattern = analyze_usage_pattern(memory_samples, MEMORY_SPIKE_THRESHOLD_MB)
+    
+    ram_during = raw_response.get("ram_usage_during")
+    if ram_during is None:
+        ram_summary = raw_response.get("ram_usage_summary") or _EMPTY
+        ram_pattern = ram_summary.get("usage_pattern", "insufficient_data")
+    else:
+        ram_samples = _scratch("ram", len(ram_during))
+        for i, sample in enumerate(ram_during):
+            ram_samples[i] = sample.get("used_gb", 0)
+        ram_pattern = analyze_usage_pattern(ram_samples, RAM_SPIKE_THRESHOLD_GB)
     
-    # Extract basic info
-    response_text = raw_response.get("response", "")
-    model = raw_response.get("model", "unknown")
-    tokens_per_second = raw_response.get("tokens_per_second", 0)
-    total_tokens = raw_response.get("total_tokens", 0)
-    total_time_seconds = raw_response.get("total_time_seconds", 0)
-    
-    # Extract GPU deltas
-    gpu_delta = raw_response.get("resource_delta", {}).get("gpu", [{}])[0]
-    memory_delta_mb = gpu_delta.get("memory_delta_mb", 0)
-    utilization_delta_percent = gpu_delta.get("utilization_delta_percent", 0)
-    
-    # Extract RAM delta
-    ram_delta = raw_response.get("resource_delta", {}).get("ram", {})
-    ram_memory_delta_gb = ram_delta.get("memory_delta_gb", 0)
-    
-    # Extract peak values
-    peak_gpu = raw_response.get("peak_gpu_usage", {}).get("gpus", [{}])[0]
-    peak_memory_mb = peak_gpu.get("memory_used_mb", 0)
-    peak_utilization_percent = peak_gpu.get("utilization_percent", 0)
-    total_vram_mb = peak_gpu.get("memory_total_mb", 6144)
-    
-    peak_ram = raw_response.get("peak_ram_usage", {})
-    peak_ram_gb = peak_ram.get("used_gb", 0)
-    
-    # Analyze patterns from during-usage data
-    gpu_during = raw_response.get("gpu_usage_during", [])
-    memory_samples = [sample.get("gpus", [{}])[0].get("memory_used_mb", 0) for sample in gpu_during]
-    utilization_samples = [sample.get("gpus", [{}])[0].get("utilization_percent", 0) for sample in gpu_during]
-    
-    ram_during = raw_response.get("ram_usage_during", [])
-    ram_samples = [sample.get("used_gb", 0) for sample in ram_during]
-    
-    # Determine patterns
-    memory_pattern = analyze_usage_pattern(memory_samples, threshold_percent=500)  # 500MB threshold
-    ram_pattern = analyze_usage_pattern(ram_samples, threshold_percent=0.5)  # 0.5GB threshold
-    
-    # Determine bottleneck and efficiency
-    bottleneck = determine_bottleneck(memory_delta_mb, utilization_delta_percent, 
-                                    ram_memory_delta_gb, total_vram_mb)
-    efficiency = calculate_efficiency(tokens_per_second, utilization_delta_percent)
-    
-    # Create simplified data structures
-    gpu_data = SimplifiedGPUData(
+    return memory_pattern, ram_pattern
+
+def _build_response(metrics: tuple, memory_pattern: str, ram_pattern: str,
+                    bottleneck: str, efficiency: str) -> SimplifiedResponse:
+    """Assemble the simplified models from extracted metrics and classifications"""
+    models = _models()
+    (response_text, model, tokens_per_second, total_tokens, total_time_seconds,
+     memory_delta_mb, utilization_delta_percent, ram_memory_delta_gb,
+     peak_memory_mb, peak_utilization_percent, _, peak_ram_gb) = metrics
+    
+    # Every value was produced locally, so skip pydantic validation
+    # and assign the fields directly
+    gpu_data = models["SimplifiedGPUData"].model_construct(
         memory_delta_mb=memory_delta_mb,
         utilization_delta_percent=utilization_delta_percent,
         peak_memory_mb=peak_memory_mb,
@@ -145,13 +287,13 @@ def clean_gpu_data(raw_response: Dict[str, Any]) -> SimplifiedResponse:
         memory_usage_pattern=memory_pattern
     )
     
-    ram_data = SimplifiedRAMData(
+    ram_data = models["SimplifiedRAMData"].model_construct(
         memory_delta_gb=round(ram_memory_delta_gb, 2),
         peak_usage_gb=round(peak_ram_gb, 2),
         usage_pattern=ram_pattern
     )
     
-    return SimplifiedResponse(
+    return models["SimplifiedResponse"].model_construct(
         response=response_text,
         model=model,
         tokens_per_second=tokens_per_second,
@@ -163,50 +305,133 @@ def clean_gpu_data(raw_response: Dict[str, Any]) -> SimplifiedResponse:
         resource_efficiency=efficiency
     )
 
-def print_clean_summary(simplified_data: SimplifiedResponse):
-    """Print a clean, readable summary of the GPU monitoring data"""
+def clean_gpu_data(raw_response: Dict[str, Any],
+                   fields: Optional[FrozenSet[str]] = None) -> SimplifiedResponse:
+    """
+    Clean and simplify the massive GPU monitoring data
+    Returns only essential metrics for load testing
     
-    print("=" * 60)
-    print("🚀 OLLAMA PERFORMANCE SUMMARY")
-    print("=" * 60)
-    
-    print(f"📝 Response: {simplified_data.response[:100]}...")
-    print(f"🤖 Model: {simplified_data.model}")
-    print(f"⚡ Speed: {simplified_data.tokens_per_second} tokens/sec")
-    print(f"📊 Total Tokens: {simplified_data.total_tokens}")
-    print(f"⏱️  Total Time: {simplified_data.total_time_seconds}s")
-    
-    print("\n🎮 GPU ANALYSIS:")
-    print(f"  💾 VRAM Used: {simplified_data.gpu_data.memory_delta_mb} MB")
-    print(f"  🔥 GPU Utilization: {simplified_data.gpu_data.utilization_delta_percent}%")
-    print(f"  📈 Peak VRAM: {simplified_data.gpu_data.peak_memory_mb} MB")
-    print(f"  📈 Peak GPU: {simplified_data.gpu_data.peak_utilization_percent}%")
-    print(f"  📉 Memory Pattern: {simplified_data.gpu_data.memory_usage_pattern}")
-    
-    print("\n🧠 RAM ANALYSIS:")
-    print(f"  💾 RAM Used: {simplified_data.ram_data.memory_delta_gb} GB")
-    print(f"  📈 Peak RAM: {simplified_data.ram_data.peak_usage_gb} GB")
-    print(f"  📉 RAM Pattern: {simplified_data.ram_data.usage_pattern}")
-    
-    print("\n🎯 LOAD TESTING INSIGHTS:")
-    print(f"  🚧 Bottleneck: {simplified_data.bottleneck_type.upper()}")
-    print(f"  ⚡ Efficiency: {simplified_data.resource_efficiency.upper()}")
-    
-    # Recommendations
-    print("\n💡 RECOMMENDATIONS:")
-    if simplified_data.bottleneck_type == "vram":
-        print("  • VRAM is the limiting factor - consider smaller model or more VRAM")
-    elif simplified_data.bottleneck_type == "gpu_compute":
-        print("  • GPU compute is the limiting factor - consider more powerful GPU")
-    elif simplified_data.bottleneck_type == "ram":
-        print("  • System RAM is the limiting factor - add more RAM")
-    else:
-        print("  • Resources are well balanced - good for scaling concurrent requests")
+    Pass `fields` to limit extraction to what the caller reads; when it does
+    not contain "peak", the peak_* values are skipped and reported as 0.
+    """
+    metrics = _extract_metrics(raw_response, fields is None or "peak" in fields)
+    (_, _, tokens_per_second, _, _, memory_delta_mb, utilization_delta_percent,
+     ram_memory_delta_gb, _, _, total_vram_mb, _) = metrics
+    
+    # Determine patterns
+    memory_pattern, ram_pattern = _usage_patterns(raw_response)
+    
+    # Determine bottleneck and efficiency
+    bottleneck = determine_bottleneck(memory_delta_mb, utilization_delta_percent, 
+                                    ram_memory_delta_gb, total_vram_mb)
+    efficiency = calculate_efficiency(tokens_per_second, utilization_delta_percent)
+    
+    return _build_response(metrics, memory_pattern, ram_pattern, bottleneck, efficiency)
+
+def clean_gpu_data_from_bytes(buf: bytes,
+                              fields: Optional[FrozenSet[str]] = None) -> SimplifiedResponse:
+    """
+    Clean a raw JSON response body without an intermediate stdlib json pass
+    orjson parses numbers straight from the bytes, which dominates the cost
+    for payloads carrying hundreds of during-usage samples
+    """
+    import orjson
+    return clean_gpu_data(orjson.loads(buf), fields)
+
+def clean_gpu_data_batch(raw_responses: List[Dict[str, Any]],
+                         fields: Optional[FrozenSet[str]] = None) -> List[SimplifiedResponse]:
+    """
+    Clean a batch of raw responses at once
+    The bottleneck and efficiency classification runs as vectorized NumPy
+    operations over per-field columns instead of once per response
+    """
+    import numpy as np
+    count = len(raw_responses)
+    with_peaks = fields is None or "peak" in fields
+    metrics = [_extract_metrics(raw_response, with_peaks) for raw_response in raw_responses]
+    
+    # Gather the classification inputs into columns
+    tokens_per_second = np.empty(count, dtype=np.float64)
+    memory_delta_mb = np.empty(count, dtype=np.int64)
+    utilization_delta = np.empty(count, dtype=np.int64)
+    ram_delta_gb = np.empty(count, dtype=np.float64)
+    total_vram_mb = np.empty(count, dtype=np.int64)
+    for i, m in enumerate(metrics):
+        tokens_per_second[i] = m[2]
+        memory_delta_mb[i] = m[5]
+        utilization_delta[i] = m[6]
+        ram_delta_gb[i] = m[7]
+        total_vram_mb[i] = m[10]
+    
+    # Same rules as determine_bottleneck, evaluated for the whole batch
+    vram_scaled = memory_delta_mb * 100
+    total_vram_mb = np.maximum(total_vram_mb, 1)
+    bottleneck_codes = np.where(
+        vram_scaled > 70 * total_vram_mb, 1,
+        np.where((utilization_delta > 50) & (vram_scaled < 50 * total_vram_mb), 2,
+                 np.where(ram_delta_gb > 2.0, 3, 0))
+    )
+    
+    # Same rules as calculate_efficiency
+    utilization = np.maximum(utilization_delta, 1)
+    efficiency_codes = ((tokens_per_second * 2 > utilization).astype(np.intp)
+                        + (tokens_per_second * 5 > utilization))
     
-    if simplified_data.resource_efficiency == "low":
-        print("  • Low efficiency - check for background processes or optimization")
+    bottlenecks = np.asarray(_BOTTLENECK_LABELS)[bottleneck_codes].tolist()
+    efficiencies = np.asarray(_EFFICIENCY_LABELS)[efficiency_codes].tolist()
     
-    print("=" * 60)
+    return [
+        _build_response(m, *_usage_patterns(raw_response), bottleneck, efficiency)
+        for m, raw_response, bottleneck, efficiency
+        in zip(metrics, raw_responses, bottlenecks, efficiencies)
+    ]
+
+_RECOMMENDATIONS = {
+    "vram": "  • VRAM is the limiting factor - consider smaller model or more VRAM",
+    "gpu_compute": "  • GPU compute is the limiting factor - consider more powerful GPU",
+    "ram": "  • System RAM is the limiting factor - add more RAM",
+}
+_BALANCED_RECOMMENDATION = "  • Resources are well balanced - good for scaling concurrent requests"
+
+def print_clean_summary(simplified_data: SimplifiedResponse):
+    """Print a clean, readable summary of the GPU monitoring data"""
+    d = simplified_data
+    gpu = d.gpu_data
+    ram = d.ram_data
+    rule = "=" * 60
+    
+    # Build the whole report and emit it with a single write
+    lines = [
+        rule,
+        "🚀 OLLAMA PERFORMANCE SUMMARY",
+        rule,
+        f"📝 Response: {d.response[:100]}...",
+        f"🤖 Model: {d.model}",
+        f"⚡ Speed: {d.tokens_per_second} tokens/sec",
+        f"📊 Total Tokens: {d.total_tokens}",
+        f"⏱️  Total Time: {d.total_time_seconds}s",
+        "\n🎮 GPU ANALYSIS:",
+        f"  💾 VRAM Used: {gpu.memory_delta_mb} MB",
+        f"  🔥 GPU Utilization: {gpu.utilization_delta_percent}%",
+        f"  📈 Peak VRAM: {gpu.peak_memory_mb} MB",
+        f"  📈 Peak GPU: {gpu.peak_utilization_percent}%",
+        f"  📉 Memory Pattern: {gpu.memory_usage_pattern}",
+        "\n🧠 RAM ANALYSIS:",
+        f"  💾 RAM Used: {ram.memory_delta_gb} GB",
+        f"  📈 Peak RAM: {ram.peak_usage_gb} GB",
+        f"  📉 RAM Pattern: {ram.usage_pattern}",
+        "\n🎯 LOAD TESTING INSIGHTS:",
+        f"  🚧 Bottleneck: {d.bottleneck_type.upper()}",
+        f"  ⚡ Efficiency: {d.resource_efficiency.upper()}",
+        # Recommendations
+        "\n💡 RECOMMENDATIONS:",
+        _RECOMMENDATIONS.get(d.bottleneck_type, _BALANCED_RECOMMENDATION),
+    ]
+    if d.resource_efficiency == "low":
+        lines.append("  • Low efficiency - check for background processes or optimization")
+    lines.append(rule)
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 # Example usage function
 def process_ollama_response(raw_response: Dict[str, Any]) -> SimplifiedResponse:
@@ -217,5 +442,18 @@ def process_ollama_response(raw_response: Dict[str, Any]) -> SimplifiedResponse:
         raw_data = {...}  # Your massive response
         clean_data = process_ollama_response(raw_data)
         print_clean_summary(clean_data)
+    
+    Expects an already-parsed dict; use process_ollama_response_bytes
+    when the response is still a raw JSON body.
     """
     return clean_gpu_data(raw_response)
+
+def process_ollama_response_bytes(buf: bytes) -> SimplifiedResponse:
+    """
+    Same as process_ollama_response but parses the raw JSON body with orjson,
+    which is considerably faster than the stdlib json module on large payloads
+    
+    Usage:
+        clean_data = process_ollama_response_bytes(response.content)
+    """
+    return clean_gpu_data_from_bytes(buf)
@@ -1,20 +1,49 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from pydantic import BaseModel
-import requests
-import json
-import platform
+from pydantic import BaseModel, computed_field
+from contextlib import aclosing, asynccontextmanager, contextmanager
+import httpx
+import orjson
 import subprocess
+import shutil
+import csv
+import io
 import re
 import psutil
-import threading
+import asyncio
+import functools
 import time
-from typing import List, Generator
-from data_cleaner import clean_gpu_data, SimplifiedResponse, print_clean_summary
+import math
+from collections import deque
+from typing import Optional, AsyncGenerator
+from data_cleaner import (
+    clean_gpu_data, SimplifiedResponse, print_clean_summary,
+    analyze_usage_pattern, prepare_pattern_kernel,
+    MEMORY_SPIKE_THRESHOLD_MB, RAM_SPIKE_THRESHOLD_GB
+)
+
+# Shared connection pool for Ollama requests, opened and closed with the app
+http_client: httpx.AsyncClient = None
 
-app = FastAPI(title="Ollama Chat API", description="Simple FastAPI to communicate with Ollama")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client
+    http_client = httpx.AsyncClient(timeout=600)
+    # The usage-pattern JIT compile happens here, not inside the first /chat
+    await asyncio.to_thread(prepare_pattern_kernel)
+    resource_sampler.start()
+    yield
+    await resource_sampler.stop()
+    await http_client.aclose()
+
+app = FastAPI(
+    title="Ollama Chat API",
+    description="Simple FastAPI to communicate with Ollama",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -24,60 +53,101 @@ app.add_middleware(
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
 )
+# NVML is initialised once and its device handles cached, so sampling is a few
+# driver calls instead of spawning nvidia-smi; without it we fall back to the CLI
+try:
+    import pynvml
+    pynvml.nvmlInit()
+    _NVML_HANDLES = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+    _NVML_NAMES = [pynvml.nvmlDeviceGetName(handle) for handle in _NVML_HANDLES]
+    # Older bindings return device names as bytes
+    _NVML_NAMES = [name.decode() if isinstance(name, bytes) else name for name in _NVML_NAMES]
+except Exception:  # pynvml not installed or no NVIDIA driver
+    _NVML_HANDLES = None
+
+# The nvidia-smi query is the same on every OS. The name is queried last because
+# nvidia-smi does not quote fields and some GPU names contain commas
+_NVIDIA_SMI_CMD = [
+    "nvidia-smi", "--query-gpu=index,memory.used,memory.total,utilization.gpu,name",
+    "--format=csv,noheader,nounits"
+]
+
 def get_gpu_usage():
-    """Get GPU usage based on OS"""
-    os_name = platform.system().lower()
+    """Get GPU usage from NVML, or from nvidia-smi when NVML is unavailable"""
+    if _NVML_HANDLES is None:
+        return get_gpu_usage_nvidia_smi()
     
     try:
-        if os_name == "windows":
-            # Windows: Use nvidia-smi
-            result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=index,name,memory.used,memory.total,utilization.gpu", 
-                 "--format=csv,noheader,nounits"], 
-                capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                gpus = []
-                for line in lines:
-                    if line.strip():
-                        parts = line.split(', ')
-                        if len(parts) >= 5:
-                            gpus.append({
-                                "index": int(parts[0]),
-                                "name": parts[1],
-                                "memory_used_mb": int(parts[2]),
-                                "memory_total_mb": int(parts[3]),
-                                "utilization_percent": int(parts[4])
-                            })
-                return {"gpus": gpus, "available": True}
-        else:
-            # Linux: Use nvidia-smi
-            result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=index,name,memory.used,memory.total,utilization.gpu", 
-                 "--format=csv,noheader,nounits"], 
-                capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                gpus = []
-                for line in lines:
-                    if line.strip():
-                        parts = line.split(', ')
-                        if len(parts) >= 5:
-                            gpus.append({
-                                "index": int(parts[0]),
-                                "name": parts[1],
-                                "memory_used_mb": int(parts[2]),
-                                "memory_total_mb": int(parts[3]),
-                                "utilization_percent": int(parts[4])
-                            })
-                return {"gpus": gpus, "available": True}
+        gpus = []
+        for index, (handle, name) in enumerate(zip(_NVML_HANDLES, _NVML_NAMES)):
+            memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            gpus.append({
+                "index": index,
+                "name": name,
+                "memory_used_mb": memory.used // (1024 * 1024),
+                "memory_total_mb": memory.total // (1024 * 1024),
+                "memory_percent": round(100 * memory.used / memory.total, 2) if memory.total else 0,
+                "utilization_percent": pynvml.nvmlDeviceGetUtilizationRates(handle).gpu
+            })
+        return {"gpus": gpus, "available": True}
+    except pynvml.NVMLError as e:
+        return {"error": str(e), "available": False}
+
+def _smi_int(field):
+    """An nvidia-smi number, 0 for fields the GPU reports as [N/A] or [Not Supported]"""
+    try:
+        return int(field)
+    except ValueError:
+        return 0
+
+def _parse_nvidia_smi_csv(stdout):
+    """Parse the rows of an nvidia-smi query made with _NVIDIA_SMI_CMD"""
+    gpus = []
+    for parts in csv.reader(io.StringIO(stdout), skipinitialspace=True):
+        if len(parts) >= 5:
+            memory_used_mb = _smi_int(parts[1])
+            memory_total_mb = _smi_int(parts[2])
+            gpus.append({
+                "index": _smi_int(parts[0]),
+                # Rejoin a name that was split on its own commas
+                "name": ", ".join(parts[4:]),
+                "memory_used_mb": memory_used_mb,
+                "memory_total_mb": memory_total_mb,
+                "memory_percent": round(100 * memory_used_mb / memory_total_mb, 2) if memory_total_mb else 0,
+                "utilization_percent": _smi_int(parts[3])
+            })
+    return gpus
+
+def get_gpu_usage_nvidia_smi():
+    """Get GPU usage from the nvidia-smi CLI"""
+    try:
+        result = subprocess.run(_NVIDIA_SMI_CMD, capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            return {"gpus": _parse_nvidia_smi_csv(result.stdout), "available": True}
     except Exception as e:
         return {"error": str(e), "available": False}
     
     return {"error": "nvidia-smi not found or failed", "available": False}
 
+def ttl_cache(ttl):
+    """Reuse the last result of a no-argument function for ttl seconds"""
+    def decorator(func):
+        cached = {"at": 0.0, "value": None}
+        
+        @functools.wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            if cached["value"] is None or now - cached["at"] >= ttl:
+                cached["value"] = func()
+                cached["at"] = now
+            return cached["value"]
+        
+        return wrapper
+    return decorator
+
+# psutil reads /proc/meminfo on every call; readings this close together are
+# effectively identical, so concurrent callers share one
+@ttl_cache(0.1)
 def get_ram_usage():
     """Get RAM usage using psutil"""
     try:
@@ -91,96 +161,232 @@ def get_ram_usage():
     except Exception as e:
         return {"error": str(e)}
 
-def calculate_resource_delta(before, after):
+def calculate_resource_delta(gpu_before, gpu_after, ram_before, ram_after):
     """Calculate the difference in resource usage"""
     delta = {}
     
     # GPU delta
-    if before.get("gpu_usage_before", {}).get("available") and after.get("gpu_usage_after", {}).get("available"):
-        gpu_before = before["gpu_usage_before"]["gpus"]
-        gpu_after = after["gpu_usage_after"]["gpus"]
-        
-        gpu_deltas = []
-        for i, (gb, ga) in enumerate(zip(gpu_before, gpu_after)):
-            gpu_deltas.append({
+    if gpu_before.get("available") and gpu_after.get("available"):
+        delta["gpu"] = [
+            {
                 "gpu_index": i,
                 "memory_delta_mb": ga["memory_used_mb"] - gb["memory_used_mb"],
                 "utilization_delta_percent": ga["utilization_percent"] - gb["utilization_percent"]
-            })
-        delta["gpu"] = gpu_deltas
+            }
+            for i, (gb, ga) in enumerate(zip(gpu_before["gpus"], gpu_after["gpus"]))
+        ]
     
     # RAM delta
-    if "ram_usage_before" in before and "ram_usage_after" in after:
-        ram_before = before["ram_usage_before"]
-        ram_after = after["ram_usage_after"]
-        
-        if "error" not in ram_before and "error" not in ram_after:
-            delta["ram"] = {
-                "memory_delta_gb": round(ram_after["used_gb"] - ram_before["used_gb"], 3),
-                "percent_delta": round(ram_after["percent_used"] - ram_before["percent_used"], 2)
-            }
+    if "error" not in ram_before and "error" not in ram_after:
+        delta["ram"] = {
+            "memory_delta_gb": round(ram_after["used_gb"] - ram_before["used_gb"], 3),
+            "percent_delta": round(ram_after["percent_used"] - ram_before["percent_used"], 2)
+        }
     
     return delta
 
-def monitor_resources_during_streaming(monitoring_data, stop_event, interval=0.5):
-    """Monitor GPU and RAM usage during streaming"""
-    while not stop_event.is_set():
-        timestamp = time.time()
-        gpu_usage = get_gpu_usage()
-        ram_usage = get_ram_usage()
+# About 13 minutes of samples at the 200ms sampling interval
+MAX_MONITOR_SAMPLES = 4096
+
+def new_monitoring_data():
+    """Create a per-request sample store with running peaks"""
+    return {
+        # Samples are kept as bounded columns rather than a dict per sample,
+        # so very long streams keep only the most recent window; the GPU
+        # series track the first GPU
+        "gpu_memory_mb": deque(maxlen=MAX_MONITOR_SAMPLES),
+        "gpu_utilization": deque(maxlen=MAX_MONITOR_SAMPLES),
+        "ram_used_gb": deque(maxlen=MAX_MONITOR_SAMPLES),
+        "ram_percent": deque(maxlen=MAX_MONITOR_SAMPLES),
+        # Peaks are updated as samples arrive so no second pass is needed
+        "peak_gpu_memory_mb": 0,
+        "peak_gpu_memory_percent": 0,
+        "peak_gpu_utilization": 0,
+        "peak_ram_gb": 0,
+        "peak_ram_percent": 0
+    }
+
+def record_sample(monitoring_data, gpu_usage, ram_usage):
+    """Store one resource sample and fold it into the running peaks"""
+    if gpu_usage.get("available") and gpu_usage["gpus"]:
+        first_gpu = gpu_usage["gpus"][0]
+        monitoring_data["gpu_memory_mb"].append(first_gpu["memory_used_mb"])
+        monitoring_data["gpu_utilization"].append(first_gpu["utilization_percent"])
         
-        monitoring_data["gpu_samples"].append({
-            "timestamp": timestamp,
-            "usage": gpu_usage
-        })
-        monitoring_data["ram_samples"].append({
-            "timestamp": timestamp,
-            "usage": ram_usage
-        })
+        for gpu in gpu_usage["gpus"]:
+            if gpu["memory_used_mb"] > monitoring_data["peak_gpu_memory_mb"]:
+                monitoring_data["peak_gpu_memory_mb"] = gpu["memory_used_mb"]
+            if gpu["memory_percent"] > monitoring_data["peak_gpu_memory_percent"]:
+                monitoring_data["peak_gpu_memory_percent"] = gpu["memory_percent"]
+            if gpu["utilization_percent"] > monitoring_data["peak_gpu_utilization"]:
+                monitoring_data["peak_gpu_utilization"] = gpu["utilization_percent"]
+    
+    if "error" not in ram_usage:
+        monitoring_data["ram_used_gb"].append(ram_usage["used_gb"])
+        monitoring_data["ram_percent"].append(ram_usage["percent_used"])
         
-        time.sleep(interval)
+        if ram_usage["used_gb"] > monitoring_data["peak_ram_gb"]:
+            monitoring_data["peak_ram_gb"] = ram_usage["used_gb"]
+        if ram_usage["percent_used"] > monitoring_data["peak_ram_percent"]:
+            monitoring_data["peak_ram_percent"] = ram_usage["percent_used"]
+
+def summarize_series(values):
+    """Summarize a sample series as min/max/mean/p95"""
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": round(sum(ordered) / count, 2),
+        "p95": ordered[math.ceil(0.95 * count) - 1]
+    }
 
-def calculate_peak_usage(samples, metric_type):
-    """Calculate peak usage from monitoring samples"""
-    if not samples:
-        return None
+def usage_summaries(monitoring_data):
+    """Return the (GPU, RAM) usage summaries, None where nothing was sampled"""
+    gpu_memory = monitoring_data["gpu_memory_mb"]
+    gpu_summary = {
+        "samples": len(gpu_memory),
+        "memory_used_mb": summarize_series(gpu_memory),
+        "utilization_percent": summarize_series(monitoring_data["gpu_utilization"]),
+        "memory_usage_pattern": analyze_usage_pattern(gpu_memory, MEMORY_SPIKE_THRESHOLD_MB)
+    } if gpu_memory else None
     
-    if metric_type == "gpu":
-        peak_memory_mb = 0
-        peak_memory_percent = 0
-        peak_utilization = 0
-        
-        for sample in samples:
-            if sample["usage"].get("available"):
-                for gpu in sample["usage"]["gpus"]:
-                    if gpu["memory_used_mb"] > peak_memory_mb:
-                        peak_memory_mb = gpu["memory_used_mb"]
-                    if gpu["memory_percent"] > peak_memory_percent:
-                        peak_memory_percent = gpu["memory_percent"]
-                    if gpu["utilization_percent"] > peak_utilization:
-                        peak_utilization = gpu["utilization_percent"]
-        
-        return {
-            "peak_gpu_utilization_%": peak_utilization,
-            "peak_gpu_vram_usage_%": peak_memory_percent,
-            "peak_gpu_vram_mb": peak_memory_mb
-        } if peak_memory_mb > 0 or peak_utilization > 0 else None
+    ram_used = monitoring_data["ram_used_gb"]
+    ram_summary = {
+        "samples": len(ram_used),
+        "used_gb": summarize_series(ram_used),
+        "percent_used": summarize_series(monitoring_data["ram_percent"]),
+        "usage_pattern": analyze_usage_pattern(ram_used, RAM_SPIKE_THRESHOLD_GB)
+    } if ram_used else None
     
-    elif metric_type == "ram":
-        peak_usage_gb = 0
-        peak_usage_percent = 0
-        
-        for sample in samples:
-            if "error" not in sample["usage"]:
-                if sample["usage"]["used_gb"] > peak_usage_gb:
-                    peak_usage_gb = sample["usage"]["used_gb"]
-                if sample["usage"]["percent_used"] > peak_usage_percent:
-                    peak_usage_percent = sample["usage"]["percent_used"]
+    return gpu_summary, ram_summary
+
+def peak_usage(monitoring_data):
+    """Return the (GPU, RAM) peak usage reports, None where nothing was sampled"""
+    peak_gpu = {
+        "peak_gpu_utilization_%": monitoring_data["peak_gpu_utilization"],
+        "peak_gpu_vram_usage_%": monitoring_data["peak_gpu_memory_percent"],
+        "peak_gpu_vram_mb": monitoring_data["peak_gpu_memory_mb"]
+    } if monitoring_data["peak_gpu_memory_mb"] > 0 or monitoring_data["peak_gpu_utilization"] > 0 else None
+    
+    peak_ram = {
+        "peak_cpu_ram_usage_%": monitoring_data["peak_ram_percent"],
+        "peak_cpu_ram_usage_mb": round(monitoring_data["peak_ram_gb"] * 1024, 2)
+    } if monitoring_data["peak_ram_gb"] > 0 else None
+    
+    return peak_gpu, peak_ram
+
+class ResourceSampler:
+    """
+    Single background sampler shared by all in-flight requests
+    Each sample is recorded into the monitoring data of every subscribed request,
+    so sampling cost does not grow with the number of concurrent requests
+    """
+    
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self._subscribers = {}
+        self._task = None
+        # Latest rows from a long-running nvidia-smi, keyed by GPU index
+        self._smi_gpus = {}
+        self._smi_task = None
+    
+    def start(self):
+        if _NVML_HANDLES is None and shutil.which("nvidia-smi"):
+            self._smi_task = asyncio.create_task(self._read_nvidia_smi_loop())
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        for task in (self._task, self._smi_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._task = self._smi_task = None
+    
+    @contextmanager
+    def subscribe(self, monitoring_data, gpu_usage, ram_usage):
+        """
+        Record samples into monitoring_data while the block runs, starting with
+        the request's own before-snapshot so requests shorter than one interval
+        still get peaks and summaries
+        """
+        record_sample(monitoring_data, gpu_usage, ram_usage)
+        self._subscribers[id(monitoring_data)] = monitoring_data
+        try:
+            yield monitoring_data
+        finally:
+            del self._subscribers[id(monitoring_data)]
+    
+    async def gpu_usage(self):
+        """Current GPU usage, from the nvidia-smi loop when it is running"""
+        if self._smi_gpus:
+            return {"gpus": list(self._smi_gpus.values()), "available": True}
+        if _NVML_HANDLES is None:
+            # nvidia-smi runs as a subprocess, keep it off the event loop
+            return await asyncio.to_thread(get_gpu_usage)
+        return get_gpu_usage()
+    
+    async def _read_nvidia_smi_loop(self):
+        """
+        Keep one nvidia-smi running in loop mode and parse its rows as they arrive,
+        instead of spawning a process for every sample
+        """
+        process = await asyncio.create_subprocess_exec(
+            *_NVIDIA_SMI_CMD, f"--loop-ms={int(self.interval * 1000)}",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            async for line in process.stdout:
+                for gpu in _parse_nvidia_smi_csv(line.decode()):
+                    self._smi_gpus[gpu["index"]] = gpu
+        finally:
+            # Fall back to one-shot sampling if nvidia-smi exits or we stop
+            self._smi_gpus = {}
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+    
+    async def _run(self):
+        while True:
+            # Nothing is sampled while no request is being monitored
+            if self._subscribers:
+                gpu_usage = await self.gpu_usage()
+                ram_usage = get_ram_usage()
+                
+                for monitoring_data in list(self._subscribers.values()):
+                    record_sample(monitoring_data, gpu_usage, ram_usage)
+            
+            await asyncio.sleep(self.interval)
+
+resource_sampler = ResourceSampler(interval=0.2)  # Monitor every 200ms
+
+async def read_ollama_stream(ollama_url, payload):
+    """Send a streaming chat request to Ollama and collect the full reply"""
+    full_response = ""
+    final_data = None
+    
+    async with http_client.stream("POST", ollama_url, json=payload) as response:
+        if response.status_code != 200:
+            # Load the error body so response.text is usable after the stream closes
+            await response.aread()
+            return response, full_response, final_data
         
-        return {
-            "peak_cpu_ram_usage_%": peak_usage_percent,
-            "peak_cpu_ram_usage_mb": round(peak_usage_gb * 1024, 2)
-        } if peak_usage_gb > 0 else None
+        # Process streaming response
+        async for line in response.aiter_lines():
+            if line:
+                try:
+                    chunk = orjson.loads(line)
+                    if "message" in chunk and "content" in chunk["message"]:
+                        full_response += chunk["message"]["content"]
+                    
+                    # Store the final chunk with metadata
+                    if chunk.get("done", False):
+                        final_data = chunk
+                        break
+                except orjson.JSONDecodeError:
+                    continue
+    
+    return response, full_response, final_data
 
 class MessageRequest(BaseModel):
     concurrency : int
@@ -192,33 +398,108 @@ class MessageResponse(BaseModel):
     model: str
     created_at: str
     done: bool
-    done_reason: str = None
+    done_reason: Optional[str] = None
     # Raw timing data (nanoseconds)
-    total_duration: int = None
-    load_duration: int = None
-    prompt_eval_count: int = None
-    prompt_eval_duration: int = None
-    eval_count: int = None
-    eval_duration: int = None
+    total_duration: Optional[int] = None
+    load_duration: Optional[int] = None
+    prompt_eval_count: Optional[int] = None
+    prompt_eval_duration: Optional[int] = None
+    eval_count: Optional[int] = None
+    eval_duration: Optional[int] = None
     # Calculated metrics for load testing
-    tokens_per_second: float = None
-    prompt_tokens_per_second: float = None
-    total_tokens: int = None
-    total_time_seconds: float = None
-    load_time_seconds: float = None
-    prompt_eval_time_seconds: float = None
-    eval_time_seconds: float = None
+    tokens_per_second: Optional[float] = None
+    prompt_tokens_per_second: Optional[float] = None
+    total_tokens: Optional[int] = None
     # Resource monitoring
-    gpu_usage_before: dict = None
-    gpu_usage_after: dict = None
-    ram_usage_before: dict = None
-    ram_usage_after: dict = None
-    resource_delta: dict = None
-    # Real-time monitoring during streaming
-    gpu_usage_during: List[dict] = None
-    ram_usage_during: List[dict] = None
-    peak_gpu_usage: dict = None
-    peak_ram_usage: dict = None
+    gpu_usage_before: Optional[dict] = None
+    gpu_usage_after: Optional[dict] = None
+    ram_usage_before: Optional[dict] = None
+    ram_usage_after: Optional[dict] = None
+    resource_delta: Optional[dict] = None
+    # Real-time monitoring during streaming, summarized
+    gpu_usage_summary: Optional[dict] = None
+    ram_usage_summary: Optional[dict] = None
+    peak_gpu_usage: Optional[dict] = None
+    peak_ram_usage: Optional[dict] = None
+    
+    # Seconds are derived from the raw durations only when serialized
+    @computed_field
+    @property
+    def total_time_seconds(self) -> float:
+        return ns_to_seconds(self.total_duration)
+    
+    @computed_field
+    @property
+    def load_time_seconds(self) -> float:
+        return ns_to_seconds(self.load_duration)
+    
+    @computed_field
+    @property
+    def prompt_eval_time_seconds(self) -> float:
+        return ns_to_seconds(self.prompt_eval_duration)
+    
+    @computed_field
+    @property
+    def eval_time_seconds(self) -> float:
+        return ns_to_seconds(self.eval_duration)
+
+def ns_to_seconds(duration_ns):
+    """Convert an Ollama nanosecond duration to seconds, rounded to ms"""
+    return round(duration_ns / 1_000_000_000, 3) if duration_ns else 0.0
+
+def tokens_per_second(token_count, duration_ns):
+    """Token throughput from a count and a nanosecond duration"""
+    if token_count > 0 and duration_ns:
+        return round(token_count * 1_000_000_000 / duration_ns, 2)
+    return 0
+
+def sse_event(payload: dict) -> bytes:
+    """Encode a payload as a Server-Sent Events data frame"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+def sse_content(content: str) -> bytes:
+    """Encode a content delta frame, the hot path of /chat/stream"""
+    return b'data: {"type":"content","content":' + orjson.dumps(content) + b"}\n\n"
+
+# Status frames never change, so they are encoded once
+SSE_STATUS = {
+    message: sse_event({'type': 'status', 'message': message})
+    for message in (
+        'Initializing request...', 'Monitoring resources...', 'Connecting to Ollama...',
+        'Processing your request...', 'Receiving response...', 'Calculating metrics...', 'Complete!'
+    )
+}
+SSE_DONE = b"data: [DONE]\n\n"
+
+# Content deltas are flushed about once per 60Hz UI frame, or sooner once
+# this many characters are pending
+CONTENT_FLUSH_INTERVAL = 0.016
+CONTENT_FLUSH_SIZE = 64
+
+async def iter_lines_or_idle(lines, idle_timeout):
+    """
+    Yield lines from an async iterator, or None each time idle_timeout()
+    seconds pass without one; an idle_timeout() of None waits indefinitely
+    """
+    lines = lines.__aiter__()
+    # The pending read is waited on, never cancelled, so no line is lost
+    next_line = asyncio.ensure_future(anext(lines))
+    try:
+        while True:
+            timeout = idle_timeout()
+            if timeout is not None:
+                done, _ = await asyncio.wait((next_line,), timeout=timeout)
+                if not done:
+                    yield None
+                    continue
+            try:
+                line = await next_line
+            except StopAsyncIteration:
+                return
+            next_line = asyncio.ensure_future(anext(lines))
+            yield line
+    finally:
+        next_line.cancel()
 
 @app.get("/")
 async def root():
@@ -229,31 +510,26 @@ async def chat_simple(request: MessageRequest):
     """
     Send a message to Ollama and get a clean, simplified response for load testing
     """
-    # Call the full chat endpoint internally
-    full_response = await chat_with_ollama(request)
-    
-    # Convert to dict and clean
-    response_dict = full_response.dict()
-    simplified = clean_gpu_data(response_dict)
-    
-    return simplified
+    # Clean the raw chat data directly, without building a MessageResponse
+    return clean_gpu_data(await _run_chat(request))
 
 @app.post("/chat", response_model=MessageResponse)
 async def chat_with_ollama(request: MessageRequest):
     """
     Send a message to Ollama with streaming and real-time resource monitoring
     """
+    # Every value was produced by _run_chat itself, so validation is skipped
+    return MessageResponse.model_construct(**await _run_chat(request))
+
+async def _run_chat(request: MessageRequest) -> dict:
+    """Run a monitored chat request against Ollama and return the raw response fields"""
     try:
         # Get resource usage before request
-        gpu_before = get_gpu_usage()
+        gpu_before = await resource_sampler.gpu_usage()
         ram_before = get_ram_usage()
         
         # Setup real-time monitoring
-        monitoring_data = {
-            "gpu_samples": [],
-            "ram_samples": []
-        }
-        stop_monitoring = threading.Event()
+        monitoring_data = new_monitoring_data()
         
         # Ollama API endpoint (default local installation)
         ollama_url = "http://localhost:11434/api/chat"
@@ -270,47 +546,12 @@ async def chat_with_ollama(request: MessageRequest):
             "stream": True
         }
         
-        # Start resource monitoring in background thread
-        monitor_thread = threading.Thread(
-            target=monitor_resources_during_streaming,
-            args=(monitoring_data, stop_monitoring, 0.2)  # Monitor every 200ms
-        )
-        monitor_thread.start()
-        
-        # Send streaming request to Ollama
-        response = requests.post(
-            ollama_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=600,
-            stream=True
-        )
-        
-        # Process streaming response
-        full_response = ""
-        final_data = None
-        
-        if response.status_code == 200:
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        chunk = json.loads(line.decode('utf-8'))
-                        if "message" in chunk and "content" in chunk["message"]:
-                            full_response += chunk["message"]["content"]
-                        
-                        # Store the final chunk with metadata
-                        if chunk.get("done", False):
-                            final_data = chunk
-                            break
-                    except json.JSONDecodeError:
-                        continue
-        
-        # Stop monitoring
-        stop_monitoring.set()
-        monitor_thread.join()
+        # Collect resource samples from the shared sampler while Ollama responds
+        with resource_sampler.subscribe(monitoring_data, gpu_before, ram_before):
+            response, full_response, final_data = await read_ollama_stream(ollama_url, payload)
         
         # Get resource usage after request
-        gpu_after = get_gpu_usage()
+        gpu_after = await resource_sampler.gpu_usage()
         ram_after = get_ram_usage()
         
         if response.status_code == 200 and final_data:
@@ -325,30 +566,18 @@ async def chat_with_ollama(request: MessageRequest):
             eval_count = final_data.get("eval_count", 0)
             eval_duration = final_data.get("eval_duration", 0)
             
-            # Calculate metrics for load testing
-            total_time_seconds = total_duration / 1_000_000_000 if total_duration else 0
-            load_time_seconds = load_duration / 1_000_000_000 if load_duration else 0
-            prompt_eval_time_seconds = prompt_eval_duration / 1_000_000_000 if prompt_eval_duration else 0
-            eval_time_seconds = eval_duration / 1_000_000_000 if eval_duration else 0
-            
-            tokens_per_second = eval_count / eval_time_seconds if eval_time_seconds > 0 and eval_count > 0 else 0
-            prompt_tokens_per_second = prompt_eval_count / prompt_eval_time_seconds if prompt_eval_time_seconds > 0 and prompt_eval_count > 0 else 0
+            # Calculate metrics for load testing; *_seconds are left to the
+            # response model so /chat/simple does not compute them
             total_tokens = prompt_eval_count + eval_count
             
             # Calculate resource deltas
-            resource_data = {
-                "gpu_usage_before": gpu_before,
-                "gpu_usage_after": gpu_after,
-                "ram_usage_before": ram_before,
-                "ram_usage_after": ram_after
-            }
-            resource_delta = calculate_resource_delta(resource_data, resource_data)
+            resource_delta = calculate_resource_delta(gpu_before, gpu_after, ram_before, ram_after)
             
-            # Calculate peak usage during streaming
-            peak_gpu = calculate_peak_usage(monitoring_data["gpu_samples"], "gpu")
-            peak_ram = calculate_peak_usage(monitoring_data["ram_samples"], "ram")
+            # Calculate peak and summarized usage during streaming
+            peak_gpu, peak_ram = peak_usage(monitoring_data)
+            gpu_summary, ram_summary = usage_summaries(monitoring_data)
             
-            return MessageResponse(
+            return dict(
                 response=message_content,
                 model=final_data.get("model", "unknown"),
                 created_at=final_data.get("created_at", ""),
@@ -360,20 +589,16 @@ async def chat_with_ollama(request: MessageRequest):
                 prompt_eval_duration=prompt_eval_duration,
                 eval_count=eval_count,
                 eval_duration=eval_duration,
-                tokens_per_second=round(tokens_per_second, 2),
-                prompt_tokens_per_second=round(prompt_tokens_per_second, 2),
+                tokens_per_second=tokens_per_second(eval_count, eval_duration),
+                prompt_tokens_per_second=tokens_per_second(prompt_eval_count, prompt_eval_duration),
                 total_tokens=total_tokens,
-                total_time_seconds=round(total_time_seconds, 3),
-                load_time_seconds=round(load_time_seconds, 3),
-                prompt_eval_time_seconds=round(prompt_eval_time_seconds, 3),
-                eval_time_seconds=round(eval_time_seconds, 3),
                 gpu_usage_before=gpu_before,
                 gpu_usage_after=gpu_after,
                 ram_usage_before=ram_before,
                 ram_usage_after=ram_after,
                 resource_delta=resource_delta,
-                gpu_usage_during=[sample["usage"] for sample in monitoring_data["gpu_samples"]],
-                ram_usage_during=[sample["usage"] for sample in monitoring_data["ram_samples"]],
+                gpu_usage_summary=gpu_summary,
+                ram_usage_summary=ram_summary,
                 peak_gpu_usage=peak_gpu,
                 peak_ram_usage=peak_ram
             )
@@ -383,12 +608,12 @@ async def chat_with_ollama(request: MessageRequest):
                 detail=f"Ollama API error: {response.status_code} - {response.text}"
             )
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         raise HTTPException(
             status_code=503,
             detail="Cannot connect to Ollama. Make sure Ollama is running on localhost:11434"
         )
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(
             status_code=504,
             detail="Request to Ollama timed out"
@@ -404,23 +629,19 @@ async def chat_stream(request: MessageRequest):
     """
     Stream chat responses in real-time using Server-Sent Events (SSE)
     """
-    def generate_stream() -> Generator[str, None, None]:
+    async def generate_stream() -> AsyncGenerator[bytes, None]:
         try:
             # Send initial status
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Initializing request...'})}\n\n"
+            yield SSE_STATUS['Initializing request...']
             
             # Get resource usage before request
-            gpu_before = get_gpu_usage()
+            gpu_before = await resource_sampler.gpu_usage()
             ram_before = get_ram_usage()
             
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Monitoring resources...'})}\n\n"
+            yield SSE_STATUS['Monitoring resources...']
             
             # Setup real-time monitoring
-            monitoring_data = {
-                "gpu_samples": [],
-                "ram_samples": []
-            }
-            stop_monitoring = threading.Event()
+            monitoring_data = new_monitoring_data()
             
             # Ollama API endpoint
             ollama_url = "http://localhost:11434/api/chat"
@@ -437,65 +658,83 @@ async def chat_stream(request: MessageRequest):
                 "stream": True
             }
             
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Connecting to Ollama...'})}\n\n"
-            
-            # Start resource monitoring in background thread
-            monitor_thread = threading.Thread(
-                target=monitor_resources_during_streaming,
-                args=(monitoring_data, stop_monitoring, 0.2)
-            )
-            monitor_thread.start()
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Processing your request...'})}\n\n"
+            yield SSE_STATUS['Connecting to Ollama...']
             
-            # Send streaming request to Ollama
-            response = requests.post(
-                ollama_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=600,
-                stream=True
-            )
-            
-            if response.status_code != 200:
-                yield f"data: {json.dumps({'type': 'error', 'message': f'Ollama API error: {response.status_code}'})}\n\n"
-                return
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Receiving response...'})}\n\n"
-            
-            # Process streaming response
-            full_response = ""
-            final_data = None
-            
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        chunk = json.loads(line.decode('utf-8'))
-                        
-                        if "message" in chunk and "content" in chunk["message"]:
-                            content = chunk["message"]["content"]
-                            full_response += content
-                            
-                            # Stream the content as it arrives
-                            yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
-                        
-                        # Store the final chunk with metadata
-                        if chunk.get("done", False):
-                            final_data = chunk
-                            break
+            # Collect resource samples from the shared sampler, and stop also
+            # when the client disconnects mid-stream
+            with resource_sampler.subscribe(monitoring_data, gpu_before, ram_before):
+                yield SSE_STATUS['Processing your request...']
+                
+                # Send streaming request to Ollama
+                async with http_client.stream("POST", ollama_url, json=payload) as response:
+                    if response.status_code != 200:
+                        yield sse_event({'type': 'error', 'message': f'Ollama API error: {response.status_code}'})
+                        return
+                    
+                    yield SSE_STATUS['Receiving response...']
+                    
+                    # Process streaming response
+                    full_response = ""
+                    final_data = None
+                    
+                    # Small deltas are coalesced into one frame per flush interval
+                    pending = []
+                    pending_chars = 0
+                    last_flush = time.monotonic()
+                    
+                    # Held-back content is flushed when the interval runs out,
+                    # even if Ollama stalls before the next token
+                    def flush_timeout():
+                        if not pending:
+                            return None
+                        return max(CONTENT_FLUSH_INTERVAL - (time.monotonic() - last_flush), 0)
+                    
+                    async with aclosing(iter_lines_or_idle(response.aiter_lines(), flush_timeout)) as lines:
+                        async for line in lines:
+                            if line is None:
+                                yield sse_content("".join(pending))
+                                pending.clear()
+                                pending_chars = 0
+                                last_flush = time.monotonic()
+                                continue
                             
-                    except json.JSONDecodeError:
-                        continue
-            
-            # Stop monitoring
-            stop_monitoring.set()
-            monitor_thread.join()
+                            if line:
+                                try:
+                                    chunk = orjson.loads(line)
+                                    
+                                    if "message" in chunk and "content" in chunk["message"]:
+                                        content = chunk["message"]["content"]
+                                        full_response += content
+                                        
+                                        if content:
+                                            pending.append(content)
+                                            pending_chars += len(content)
+                                        
+                                        # Stream the content as it arrives, batched
+                                        now = time.monotonic()
+                                        if pending and (now - last_flush >= CONTENT_FLUSH_INTERVAL
+                                                        or pending_chars > CONTENT_FLUSH_SIZE):
+                                            yield sse_content("".join(pending))
+                                            pending.clear()
+                                            pending_chars = 0
+                                            last_flush = now
+                                    
+                                    # Store the final chunk with metadata
+                                    if chunk.get("done", False):
+                                        final_data = chunk
+                                        break
+                                        
+                                except orjson.JSONDecodeError:
+                                    continue
+                    
+                    if pending:
+                        yield sse_content("".join(pending))
             
             # Get resource usage after request
-            gpu_after = get_gpu_usage()
+            gpu_after = await resource_sampler.gpu_usage()
             ram_after = get_ram_usage()
             
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Calculating metrics...'})}\n\n"
+            yield SSE_STATUS['Calculating metrics...']
             
             if final_data:
                 # Calculate all metrics
@@ -506,28 +745,13 @@ async def chat_stream(request: MessageRequest):
                 eval_count = final_data.get("eval_count", 0)
                 eval_duration = final_data.get("eval_duration", 0)
                 
-                # Calculate metrics
-                total_time_seconds = total_duration / 1_000_000_000 if total_duration else 0
-                load_time_seconds = load_duration / 1_000_000_000 if load_duration else 0
-                prompt_eval_time_seconds = prompt_eval_duration / 1_000_000_000 if prompt_eval_duration else 0
-                eval_time_seconds = eval_duration / 1_000_000_000 if eval_duration else 0
-                
-                tokens_per_second = eval_count / eval_time_seconds if eval_time_seconds > 0 and eval_count > 0 else 0
-                prompt_tokens_per_second = prompt_eval_count / prompt_eval_time_seconds if prompt_eval_time_seconds > 0 and prompt_eval_count > 0 else 0
                 total_tokens = prompt_eval_count + eval_count
                 
                 # Calculate resource deltas
-                resource_data = {
-                    "gpu_usage_before": gpu_before,
-                    "gpu_usage_after": gpu_after,
-                    "ram_usage_before": ram_before,
-                    "ram_usage_after": ram_after
-                }
-                resource_delta = calculate_resource_delta(resource_data, resource_data)
+                resource_delta = calculate_resource_delta(gpu_before, gpu_after, ram_before, ram_after)
                 
                 # Calculate peak usage
-                peak_gpu = calculate_peak_usage(monitoring_data["gpu_samples"], "gpu")
-                peak_ram = calculate_peak_usage(monitoring_data["ram_samples"], "ram")
+                peak_gpu, peak_ram = peak_usage(monitoring_data)
                 
                 # Send final metrics
                 metrics = {
@@ -536,40 +760,51 @@ async def chat_stream(request: MessageRequest):
                     "created_at": final_data.get("created_at", ""),
                     "done": True,
                     "total_duration": total_duration,
-                    "tokens_per_second": round(tokens_per_second, 2),
-                    "prompt_tokens_per_second": round(prompt_tokens_per_second, 2),
+                    "tokens_per_second": tokens_per_second(eval_count, eval_duration),
+                    "prompt_tokens_per_second": tokens_per_second(prompt_eval_count, prompt_eval_duration),
                     "total_tokens": total_tokens,
-                    "total_time_seconds": round(total_time_seconds, 3),
-                    "load_time_seconds": round(load_time_seconds, 3),
-                    "prompt_eval_time_seconds": round(prompt_eval_time_seconds, 3),
-                    "eval_time_seconds": round(eval_time_seconds, 3),
+                    "total_time_seconds": ns_to_seconds(total_duration),
+                    "load_time_seconds": ns_to_seconds(load_duration),
+                    "prompt_eval_time_seconds": ns_to_seconds(prompt_eval_duration),
+                    "eval_time_seconds": ns_to_seconds(eval_duration),
                     "resource_delta": resource_delta,
                     "peak_gpu_usage": peak_gpu,
                     "peak_ram_usage": peak_ram
                 }
                 
-                yield f"data: {json.dumps(metrics)}\n\n"
+                yield sse_event(metrics)
             
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Complete!'})}\n\n"
-            yield "data: [DONE]\n\n"
+            yield SSE_STATUS['Complete!']
+            yield SSE_DONE
             
-        except requests.exceptions.ConnectionError:
-            yield f"data: {json.dumps({'type': 'error', 'message': 'Cannot connect to Ollama. Make sure Ollama is running on localhost:11434'})}\n\n"
-        except requests.exceptions.Timeout:
-            yield f"data: {json.dumps({'type': 'error', 'message': 'Request to Ollama timed out'})}\n\n"
+        except httpx.ConnectError:
+            yield sse_event({'type': 'error', 'message': 'Cannot connect to Ollama. Make sure Ollama is running on localhost:11434'})
+        except httpx.TimeoutException:
+            yield sse_event({'type': 'error', 'message': 'Request to Ollama timed out'})
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': f'Unexpected error: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'Unexpected error: {str(e)}'})
     
     return StreamingResponse(
         generate_stream(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
+            # Keep reverse proxies such as nginx from buffering the event stream
+            "X-Accel-Buffering": "no",
         }
     )
 
 if __name__ == "__main__":
+    import os
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        # uvloop does not support Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WORKERS", "1"))
+    )
@@ -0,0 +1,48 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Native SSE framing scanner used by test_streaming.py when it is built
+Build in place with: cythonize -3 -i sse_scan.pyx
+"""
+
+from cpython.bytearray cimport PyByteArray_AS_STRING, PyByteArray_GET_SIZE
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from libc.string cimport memchr, memcmp
+
+
+cdef inline int _data_line(const char* data, Py_ssize_t start, Py_ssize_t end, list out) except -1:
+    """Append the payload of the line data[start:end] if it is a `data:` line"""
+    if end - start < 5 or memcmp(data + start, b"data:", 5) != 0:
+        return 0
+
+    start += 5
+    while start < end and (data[start] == b' ' or data[start] == b'\t'):
+        start += 1
+    while end > start and (data[end - 1] == b' ' or data[end - 1] == b'\t' or data[end - 1] == b'\r'):
+        end -= 1
+
+    out.append(PyBytes_FromStringAndSize(data + start, end - start))
+    return 0
+
+
+def scan(bytearray buf):
+    """
+    Remove every complete line from buf and return the payloads of its `data:` lines
+    Same contract as test_streaming.pop_sse_data
+    """
+    cdef const char* data = PyByteArray_AS_STRING(buf)
+    cdef Py_ssize_t size = PyByteArray_GET_SIZE(buf)
+    cdef Py_ssize_t line_start = 0
+    cdef const char* newline
+    cdef list payloads = []
+
+    while line_start < size:
+        newline = <const char*>memchr(data + line_start, b'\n', size - line_start)
+        if newline == NULL:
+            break
+        _data_line(data, line_start, newline - data, payloads)
+        line_start = newline - data + 1
+
+    # Drop the consumed lines in one go rather than per line
+    if line_start:
+        del buf[:line_start]
+    return payloads
@@ -6,7 +6,7 @@ import json
 from data_cleaner import clean_gpu_data, print_clean_summary
 
 def test_full_response():
-    """Test the full detailed response"""
+    """Test the full detailed response, returning it with its size in bytes"""
     url = "http://localhost:8000/chat"
     payload = {
         "message": "hi",
@@ -18,20 +18,21 @@ def test_full_response():
     
     if response.status_code == 200:
         data = response.json()
-        print(f"Full response size: {len(json.dumps(data))} characters")
+        size = len(response.content)
+        print(f"Full response size: {size} bytes")
         
         # Show simplified version of this data
         print("\n🧹 CLEANING THE DATA...")
         simplified = clean_gpu_data(data)
         print_clean_summary(simplified)
         
-        return data
+        return data, size
     else:
         print(f"Error: {response.status_code} - {response.text}")
-        return None
+        return None, 0
 
 def test_simplified_response():
-    """Test the simplified response endpoint"""
+    """Test the simplified response endpoint, returning it with its size in bytes"""
     url = "http://localhost:8000/chat/simple"
     payload = {
         "message": "explain rust vs python",
@@ -43,13 +44,14 @@ def test_simplified_response():
     
     if response.status_code == 200:
         data = response.json()
-        print(f"Simplified response size: {len(json.dumps(data))} characters")
+        size = len(response.content)
+        print(f"Simplified response size: {size} bytes")
         print("\nSimplified Response:")
         print(json.dumps(data, indent=2))
-        return data
+        return data, size
     else:
         print(f"Error: {response.status_code} - {response.text}")
-        return None
+        return None, 0
 
 def compare_responses():
     """Compare both response types"""
@@ -58,17 +60,16 @@ def compare_responses():
     print("=" * 80)
     
     # Test both
-    full_data = test_full_response()
-    simplified_data = test_simplified_response()
+    full_data, full_size = test_full_response()
+    simplified_data, simple_size = test_simplified_response()
     
     if full_data and simplified_data:
-        full_size = len(json.dumps(full_data))
-        simple_size = len(json.dumps(simplified_data))
+        # Sizes are the raw response bodies, so nothing is re-serialized
         reduction = ((full_size - simple_size) / full_size) * 100
         
         print(f"\n📊 SIZE COMPARISON:")
-        print(f"  Full response: {full_size:,} characters")
-        print(f"  Simplified: {simple_size:,} characters")
+        print(f"  Full response: {full_size:,} bytes")
+        print(f"  Simplified: {simple_size:,} bytes")
         print(f"  Reduction: {reduction:.1f}%")
         
         print(f"\n🎯 KEY INSIGHTS FROM SIMPLIFIED DATA:")
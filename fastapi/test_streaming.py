@@ -4,18 +4,325 @@ Simple Python client to test the streaming chat endpoint
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import httpx
+import argparse
+import asyncio
+import math
+import os
+import re
+import signal
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def test_streaming_chat():
-    """Test the streaming chat endpoint"""
+# Use the fastest JSON parser available; all of them accept bytes
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
     
-    url = "http://localhost:8000/chat/stream"
+    def format_json(data):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    import json
+    try:
+        from ujson import loads as json_loads
+    except ImportError:
+        json_loads = json.loads
     
-    payload = {
-        "message": "Tell me a short story about a robot learning to paint",
-        "model": "qwen3:4b-q8_0"
+    def json_dumps(data):
+        return json.dumps(data).encode()
+    
+    def format_json(data):
+        return json.dumps(data, indent=2, ensure_ascii=False)
+
+# One pass per complete `data:` line, capturing the payload without its
+# surrounding blanks or a trailing CR
+SSE_DATA_LINE = re.compile(rb'^data:[ \t]*(.*?)[ \t\r]*\n', re.M)
+
+def pop_sse_data(buf):
+    """
+    Remove every complete line from buf and return the payloads of its `data:` lines
+    A partial trailing line is left in buf until the rest of it arrives
+    """
+    end = buf.rfind(b'\n') + 1
+    if not end:
+        return []
+    
+    payloads = SSE_DATA_LINE.findall(buf, 0, end)
+    # Drop the consumed lines in one go rather than per line
+    del buf[:end]
+    return payloads
+
+# The pure-Python scanner stays reachable so tests can check the compiled one against it
+pop_sse_data_py = pop_sse_data
+
+# Use the compiled scanner when it has been built (cythonize -3 -i sse_scan.pyx)
+try:
+    from sse_scan import scan as pop_sse_data
+except ImportError:
+    pass
+
+# Read size for the raw response stream; set SSE_CHUNK to experiment
+SSE_CHUNK = int(os.environ.get("SSE_CHUNK", "65536"))
+
+def iter_raw_chunks(response):
+    """Raw body chunks of a streamed requests response, decompressed if needed"""
+    # Chunked responses still yield each chunk as soon as it arrives
+    return response.raw.stream(SSE_CHUNK, decode_content=True)
+
+# Set by Ctrl-C so streams stop at the next chunk and close their response
+# cleanly instead of being torn down mid-read
+_STOP = threading.Event()
+
+def _request_stop(signum, frame):
+    # A second Ctrl-C interrupts at once, e.g. while a read is still blocked
+    if _STOP.is_set():
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        raise KeyboardInterrupt
+    _STOP.set()
+
+def iter_sse_data(chunks, state=None):
+    """
+    Yield SSE `data:` payloads as bytes from an iterable of raw byte chunks
+    With a stream state, batched content is flushed after each chunk, before
+    blocking on the next read
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        if _STOP.is_set():
+            break
+        buf.extend(chunk)
+        yield from pop_sse_data(buf)
+        if state is not None and state["pending_output"]:
+            write_pending_output(state)
+
+def _on_status(data, state):
+    print(f"📊 Status: {data['message']}")
+
+def _on_content(data, state):
+    state["handle_content"](data['content'], state)
+
+def _print_content(content, state):
+    state["append_content"](content)
+    # Print content as it streams, in batches rather than per token
+    if state["interactive"]:
+        state["pending_output"].append(content)
+        now = _monotonic()
+        if now - state["last_flush"] > CONTENT_FLUSH_INTERVAL or '\n' in content:
+            write_pending_output(state)
+            state["last_flush"] = now
+    else:
+        state["write"](content)
+
+def write_pending_output(state):
+    """
+    Write batched content straight to the terminal's file descriptor,
+    skipping the locking and encoding layers of sys.stdout
+    """
+    fd = state["stdout_fd"]
+    data = memoryview("".join(state["pending_output"]).encode('utf-8'))
+    # os.write may take only part of a large batch, so write until it is all out
+    while data:
+        data = data[os.write(fd, data):]
+    state["pending_output"].clear()
+
+# The RAM delta is a float and goes through a template built once; the GPU
+# deltas are whole numbers, so they are joined with str() and not formatted
+_RAM_LINE = "   • RAM Delta: {:.3f} GB".format
+
+def print_resource_summary(delta):
+    """Print the RAM and per-GPU changes from a metrics frame's resource_delta"""
+    ram = delta.get('ram')
+    gpus = delta.get('gpu') or ()
+    
+    lines = ["\n🔧 Resource Usage:"]
+    if ram:
+        lines.append(_RAM_LINE(ram['memory_delta_gb']))
+    for gpu in gpus:
+        lines.append("   • GPU " + str(gpu['gpu_index']) + ": " + str(gpu['memory_delta_mb'])
+                     + " MB, " + str(gpu['utilization_delta_percent']) + "% util")
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
+
+def _on_metrics(data, state):
+    # Printed once per stream, so the frame is shown as-is rather than key by key
+    print("\n" + "-"*60)
+    print("📈 Performance Metrics:")
+    print(format_json(data))
+    
+    # Show a resource usage summary if requested and available
+    if state["show_resources"]:
+        delta = data.get('resource_delta')
+        if delta:
+            print_resource_summary(delta)
+
+def _on_error(data, state):
+    print(f"❌ Error: {data['message']}", flush=True)
+    return True
+
+def _on_unknown(data, state):
+    pass
+
+# On a terminal, streamed content is written at most this often (or at a
+# newline); when piped it is flushed once the stream ends
+CONTENT_FLUSH_INTERVAL = 0.05
+_monotonic = time.monotonic
+
+# SSE frame type -> handler, looked up once per frame
+FRAME_HANDLERS = {
+    'status': _on_status,
+    'content': _on_content,
+    'metrics': _on_metrics,
+    'error': _on_error,
+}
+
+def _record_metrics(data, state):
+    state["metrics"] = data
+
+def _keep_content(content, state):
+    state["append_content"](content)
+
+# Only the content and metrics are kept when many streams run at once
+QUIET_FRAME_HANDLERS = {
+    'content': _on_content,
+    'metrics': _record_metrics,
+    'error': _on_error,
+}
+
+# Connections are kept alive and reused across requests
+SESSION = requests.Session()
+SESSION.headers["Content-Type"] = "application/json"
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+STREAM_URL = "http://localhost:8000/chat/stream"
+
+STREAM_PAYLOAD = {
+    "concurrency": 1,
+    "message": "Tell me a short story about a robot learning to paint",
+    "model": "qwen3:4b-q8_0"
+}
+
+# The request body is encoded once and reused by every streaming request
+STREAM_BODY = json_dumps(STREAM_PAYLOAD)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def new_stream_state(quiet=False, show_resources=False):
+    """Per-stream state shared by the frame handlers"""
+    content_chunks = []
+    interactive = sys.stdout.isatty()
+    return {
+        # Content pieces are joined once at the end instead of growing a string
+        "content_chunks": content_chunks,
+        "append_content": content_chunks.append,
+        "get_handler": (QUIET_FRAME_HANDLERS if quiet else FRAME_HANDLERS).get,
+        "handle_content": _keep_content if quiet else _print_content,
+        "quiet": quiet,
+        "show_resources": show_resources,
+        # Terminals get raw writes to the fd; captured or piped output stays
+        # on the buffered sys.stdout
+        "write": sys.stdout.write,
+        "interactive": interactive,
+        "stdout_fd": sys.stdout.fileno() if interactive else None,
+        "pending_output": [],
+        "malformed": 0,
+        # Only set by [DONE]; streams ending on an error frame or at EOF stay incomplete
+        "done": False,
+        "last_flush": time.monotonic()
     }
+
+# Content frames exactly as the server encodes them, capturing the raw string
+CONTENT_FRAME = re.compile(rb'\{"type":"content","content":"((?:[^"\\]|\\.)*)"\}')
+
+# Malformed frames reported per stream before the rest are only counted
+MALFORMED_REPORT_LIMIT = 5
+
+def _on_malformed(data_bytes, state, reason):
+    state["malformed"] += 1
+    if state["malformed"] <= MALFORMED_REPORT_LIMIT:
+        print(f"⚠️  Malformed frame ({reason}): {data_bytes[:80]!r}")
+        if state["malformed"] == MALFORMED_REPORT_LIMIT:
+            print("⚠️  Further malformed frames will not be reported")
+
+def sse_data_handler(state):
+    """
+    Build the handler for one stream's SSE data payloads; it returns True once
+    the stream is over. Everything it uses per frame is bound here as a local
+    """
+    match_content = CONTENT_FRAME.fullmatch
+    handle_content = state["handle_content"]
+    get_handler = state["get_handler"]
+    pending_output = state["pending_output"]
+    loads = json_loads
+    
+    def handle(data_bytes):
+        if data_bytes == b'[DONE]':
+            state["done"] = True
+            if pending_output:
+                write_pending_output(state)
+            if not state["quiet"]:
+                print("\n" + "="*60)
+                print("🎉 Stream completed successfully!")
+            return True
+        
+        # Content frames, the bulk of the stream, skip the JSON parser and its
+        # dict unless the text contains escapes
+        match = match_content(data_bytes)
+        if match is not None:
+            content = match.group(1)
+            if b'\\' not in content:
+                handle_content(content.decode('utf-8'), state)
+                return False
+        
+        # Frames the server sends are JSON objects, so anything else is reported
+        # before parsing; empty data lines are valid SSE and simply skipped
+        first_byte = data_bytes[:1]
+        if first_byte != b'{':
+            if first_byte:
+                _on_malformed(data_bytes, state, "not a JSON object")
+            return False
+        
+        try:
+            data = loads(data_bytes)
+        # Every parser's decode error subclasses ValueError
+        except ValueError as e:
+            _on_malformed(data_bytes, state, f"JSON decode error: {e}")
+            return False
+        
+        # A payload starting with '{' parses to a dict, but may lack a usable type
+        frame_type = data.get('type')
+        if not isinstance(frame_type, str):
+            _on_malformed(data_bytes, state, "missing frame type")
+            return False
+        
+        # Batched content goes out before anything else is printed
+        if pending_output and frame_type != 'content':
+            write_pending_output(state)
+        
+        # Handlers return True to stop reading the stream
+        return get_handler(frame_type, _on_unknown)(data, state)
+    
+    return handle
+
+def finish_stream(state):
+    """Flush pending output and return the streamed content"""
+    if state["pending_output"]:
+        write_pending_output(state)
+    sys.stdout.flush()
+    return "".join(state["content_chunks"])
+
+def completed_content(state):
+    """Like finish_stream, but None unless the stream reached [DONE]"""
+    content = finish_stream(state)
+    return content if state["done"] else None
+
+def test_streaming_chat(show_resources=False):
+    """Test the streaming chat endpoint, returning the streamed content"""
+    
+    url = STREAM_URL
+    payload = STREAM_PAYLOAD
     
     print("🚀 Starting streaming chat test...")
     print(f"📤 Sending message: {payload['message']}")
@@ -23,77 +330,28 @@ def test_streaming_chat():
     print("-" * 60)
     
     try:
-        response = requests.post(
-            url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            stream=True,
-            timeout=600
-        )
+        response = SESSION.post(url, data=STREAM_BODY, stream=True, timeout=600)
         
-        if response.status_code == 200:
-            print("✅ Connected successfully!")
-            print("-" * 60)
-            
-            content_buffer = ""
-            
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8')
-                    
-                    if line_str.startswith('data: '):
-                        data_str = line_str[6:].strip()
-                        
-                        if data_str == '[DONE]':
-                            print("\n" + "="*60)
-                            print("🎉 Stream completed successfully!")
-                            break
-                        
-                        try:
-                            data = json.loads(data_str)
-                            
-                            if data['type'] == 'status':
-                                print(f"📊 Status: {data['message']}")
-                            
-                            elif data['type'] == 'content':
-                                content = data['content']
-                                content_buffer += content
-                                # Print content as it streams
-                                print(content, end='', flush=True)
-                            
-                            elif data['type'] == 'metrics':
-                                print("\n" + "-"*60)
-                                print("📈 Performance Metrics:")
-                                print(f"   • Total Time: {data['total_time_seconds']}s")
-                                print(f"   • Tokens/Second: {data['tokens_per_second']}")
-                                print(f"   • Total Tokens: {data['total_tokens']}")
-                                print(f"   • Load Time: {data['load_time_seconds']}s")
-                                print(f"   • Model: {data['model']}")
-                                print(f"   • Eval Time: {data['eval_time_seconds']}s")
-                                
-                                # Show resource usage if available
-                                if data.get('resource_delta'):
-                                    print("\n🔧 Resource Usage:")
-                                    delta = data['resource_delta']
-                                    if 'ram' in delta:
-                                        ram_delta = delta['ram']['memory_delta_gb']
-                                        print(f"   • RAM Delta: {ram_delta:.3f} GB")
-                                    if 'gpu' in delta and delta['gpu']:
-                                        for gpu in delta['gpu']:
-                                            mem_delta = gpu['memory_delta_mb']
-                                            util_delta = gpu['utilization_delta_percent']
-                                            print(f"   • GPU {gpu['gpu_index']}: {mem_delta} MB, {util_delta}% util")
-                            
-                            elif data['type'] == 'error':
-                                print(f"❌ Error: {data['message']}")
-                                break
-                                
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️  JSON decode error: {e}")
-                            continue
-        else:
-            print(f"❌ HTTP Error: {response.status_code}")
-            print(f"Response: {response.text}")
+        # Closing the response hands the connection back to the pool
+        with response:
+            if response.status_code == 200:
+                print("✅ Connected successfully!")
+                print("-" * 60)
+                
+                state = new_stream_state(show_resources=show_resources)
+                handle = sse_data_handler(state)
+                
+                # Raw 64 KiB reads; lines are only cut out at their delimiter
+                for data_bytes in iter_sse_data(iter_raw_chunks(response), state):
+                    if handle(data_bytes):
+                        break
+                
+                if _STOP.is_set():
+                    print("\n⏹️  Stream interrupted")
+                return finish_stream(state)
+            else:
+                print(f"❌ HTTP Error: {response.status_code}")
+                print(f"Response: {response.text}")
             
     except requests.exceptions.ConnectionError:
         print("❌ Connection Error: Cannot connect to the FastAPI server.")
@@ -103,12 +361,179 @@ def test_streaming_chat():
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
 
+async def test_streaming_chat_async(session, quiet=False, show_resources=False):
+    """
+    Stream one chat over a shared aiohttp session, returning the streamed content,
+    or None if the stream ended without [DONE]
+    Many of these can run concurrently on one event loop and connection pool
+    """
+    state = new_stream_state(quiet, show_resources)
+    handle = sse_data_handler(state)
+    buf = bytearray()
+    
+    async with session.post(STREAM_URL, data=STREAM_BODY, headers=JSON_HEADERS) as response:
+        if response.status != 200:
+            print(f"❌ HTTP Error: {response.status}")
+            print(f"Response: {await response.text()}")
+            return None
+        
+        try:
+            async for chunk in response.content.iter_chunked(SSE_CHUNK):
+                buf.extend(chunk)
+                for data_bytes in pop_sse_data(buf):
+                    if handle(data_bytes):
+                        return completed_content(state)
+                # Nothing batched waits on the next read
+                if state["pending_output"]:
+                    write_pending_output(state)
+        # Ctrl-C cancels every stream; flush what was batched before the
+        # response is released on the way out
+        except asyncio.CancelledError:
+            finish_stream(state)
+            raise
+    
+    return completed_content(state)
+
+async def run_concurrent_streams(count, show_resources=False):
+    """Run count streaming chats concurrently and report how many completed"""
+    import aiohttp
+    
+    print(f"🚀 Starting {count} concurrent streaming chats...")
+    started = time.perf_counter()
+    
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64),
+        timeout=aiohttp.ClientTimeout(total=600)
+    ) as session:
+        # A single stream still prints as it goes
+        results = await asyncio.gather(
+            *(test_streaming_chat_async(session, count > 1, show_resources) for _ in range(count)),
+            return_exceptions=True
+        )
+    
+    elapsed = time.perf_counter() - started
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"❌ Stream failed: {result!r}")
+    completed = [result for result in results if isinstance(result, str)]
+    print(f"✅ {len(completed)}/{count} streams completed in {elapsed:.2f}s")
+    print(f"📝 Streamed {sum(map(len, completed)):,} characters")
+
+_thread_local = threading.local()
+
+def _timed_stream(started, chunks):
+    """
+    Consume one benchmark stream quietly from its raw chunks
+    Returns (seconds since started, server-reported tokens/sec), or None if it
+    never reached [DONE]
+    """
+    state = new_stream_state(quiet=True)
+    handle = sse_data_handler(state)
+    for data_bytes in iter_sse_data(chunks):
+        if handle(data_bytes):
+            break
+    
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+    # Streams cut short by an error frame, EOF or Ctrl-C would skew the percentiles
+    if not state["done"]:
+        return None
+    return elapsed, state.get("metrics", {}).get("tokens_per_second", 0)
+
+def _benchmark_worker(index):
+    """Stream one chat on this thread's own requests session, see _timed_stream"""
+    # Requests still queued when Ctrl-C arrives are not started
+    if _STOP.is_set():
+        return None
+    
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    
+    started = time.perf_counter_ns()
+    try:
+        with session.post(STREAM_URL, data=STREAM_BODY, headers=JSON_HEADERS,
+                          stream=True, timeout=600) as response:
+            response.raise_for_status()
+            return _timed_stream(started, iter_raw_chunks(response))
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Request {index} failed: {e}")
+        return None
+
+def make_http2_client(concurrency):
+    """
+    One httpx client shared by every benchmark thread, offering HTTP/2
+    The pool is sized for concurrency connections: when h2 is negotiated the
+    streams multiplex over one of them, otherwise each gets its own HTTP/1.1
+    connection instead of queuing behind the others
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        return httpx.Client(http2=True, timeout=600.0, limits=limits)
+    except ImportError:
+        print("⚠️  h2 is not installed, falling back to HTTP/1.1 (pip install 'httpx[http2]')")
+        return httpx.Client(timeout=600.0, limits=limits)
+
+def _benchmark_worker_http2(client, versions, index):
+    """
+    Stream one chat on the shared httpx client, see _timed_stream
+    Adds the protocol each response actually used to versions
+    """
+    if _STOP.is_set():
+        return None
+    
+    started = time.perf_counter_ns()
+    try:
+        with client.stream("POST", STREAM_URL, content=STREAM_BODY, headers=JSON_HEADERS) as response:
+            response.raise_for_status()
+            versions.add(response.http_version)
+            return _timed_stream(started, response.iter_bytes(SSE_CHUNK))
+    except httpx.HTTPError as e:
+        print(f"❌ Request {index} failed: {e}")
+        return None
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)]
+
+def benchmark(concurrency, request_count, http2=False):
+    """Run request_count streaming chats on concurrency threads and print latency/throughput percentiles"""
+    print(f"🚀 Benchmarking {request_count} streaming chats, {concurrency} at a time...")
+    worker = _benchmark_worker
+    client = None
+    versions = set()
+    if http2:
+        client = make_http2_client(concurrency)
+        worker = lambda index: _benchmark_worker_http2(client, versions, index)
+    started = time.perf_counter_ns()
+    
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = [result for result in executor.map(worker, range(request_count)) if result]
+    finally:
+        if client is not None:
+            client.close()
+    
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+    # httpx only negotiates HTTP/2 over TLS, so a plain http:// server gets HTTP/1.1
+    if versions:
+        print(f"🔌 Negotiated protocol: {', '.join(sorted(versions))}")
+    print(f"✅ {len(results)}/{request_count} streams completed in {elapsed:.2f}s")
+    if not results:
+        return
+    
+    latencies = sorted(result[0] for result in results)
+    rates = sorted(result[1] for result in results)
+    print("📈 Percentiles:        p50       p95       p99")
+    print(f"   • Latency (s): {percentile(latencies, 50):9.3f} {percentile(latencies, 95):9.3f} {percentile(latencies, 99):9.3f}")
+    print(f"   • Tokens/sec:  {percentile(rates, 50):9.2f} {percentile(rates, 95):9.2f} {percentile(rates, 99):9.2f}")
+
 def test_simple_chat():
     """Test the simple non-streaming chat endpoint for comparison"""
     
     url = "http://localhost:8000/chat"
     
     payload = {
+        "concurrency": 1,
         "message": "Hello! How are you?",
         "model": "qwen3:4b-q8_0"
     }
@@ -116,10 +541,11 @@ def test_simple_chat():
     print("🔄 Testing simple (non-streaming) chat...")
     
     try:
-        response = requests.post(url, json=payload, timeout=600)
+        response = SESSION.post(url, json=payload, timeout=600)
         
         if response.status_code == 200:
-            data = response.json()
+            # Parse the body bytes directly instead of decoding them to text first
+            data = json_loads(response.content)
             print(f"✅ Response: {data['response'][:100]}...")
             print(f"📊 Tokens/sec: {data['tokens_per_second']}")
             print(f"⏱️  Total time: {data['total_time_seconds']}s")
@@ -130,7 +556,32 @@ def test_simple_chat():
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "simple":
+    parser = argparse.ArgumentParser(description="Test the chat endpoints")
+    parser.add_argument("mode", nargs="?", choices=["stream", "simple", "async"], default="stream")
+    parser.add_argument("streams", nargs="?", type=int, default=1,
+                        help="number of concurrent streams in async mode")
+    parser.add_argument("--resources", action="store_true",
+                        help="also print a resource usage summary after the metrics")
+    parser.add_argument("--requests", type=int,
+                        help="benchmark this many streaming chats on a thread pool")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="number of benchmark threads")
+    parser.add_argument("--http2", action="store_true",
+                        help="run the benchmark on an httpx client that multiplexes streams when HTTP/2 is negotiated")
+    args = parser.parse_args()
+    
+    # asyncio.run already turns Ctrl-C into cancelling the streams
+    if args.mode != "async":
+        signal.signal(signal.SIGINT, _request_stop)
+    
+    if args.requests:
+        benchmark(args.concurrency, args.requests, args.http2)
+    elif args.mode == "simple":
         test_simple_chat()
+    elif args.mode == "async":
+        try:
+            asyncio.run(run_concurrent_streams(args.streams, args.resources))
+        except KeyboardInterrupt:
+            print("\n⏹️  Streams interrupted")
     else:
-        test_streaming_chat()
+        test_streaming_chat(args.resources)
@@ -0,0 +1,39 @@
+from main import _parse_nvidia_smi_csv
+
+
+def test_name_with_commas_is_kept_whole():
+    gpus = _parse_nvidia_smi_csv("1, 2048, 40960, 35, NVIDIA A100, SXM4\n")
+
+    assert gpus == [{
+        "index": 1,
+        "name": "NVIDIA A100, SXM4",
+        "memory_used_mb": 2048,
+        "memory_total_mb": 40960,
+        "memory_percent": 5.0,
+        "utilization_percent": 35
+    }]
+
+
+def test_multiple_rows():
+    stdout = (
+        "0, 5000, 24576, 80, NVIDIA GeForce RTX 4090\n"
+        "1, 2500, 40960, 10, NVIDIA A100, SXM4\n"
+    )
+    gpus = _parse_nvidia_smi_csv(stdout)
+
+    assert [gpu["index"] for gpu in gpus] == [0, 1]
+    assert [gpu["name"] for gpu in gpus] == ["NVIDIA GeForce RTX 4090", "NVIDIA A100, SXM4"]
+    assert [gpu["utilization_percent"] for gpu in gpus] == [80, 10]
+
+
+def test_unavailable_fields_read_as_zero():
+    gpus = _parse_nvidia_smi_csv("0, 1024, [N/A], [Not Supported], Tesla K80\n")
+
+    assert gpus[0]["memory_used_mb"] == 1024
+    assert gpus[0]["memory_total_mb"] == 0
+    assert gpus[0]["memory_percent"] == 0
+    assert gpus[0]["utilization_percent"] == 0
+
+
+def test_short_and_blank_lines_are_skipped():
+    assert _parse_nvidia_smi_csv("\n0, 1, 2\n") == []
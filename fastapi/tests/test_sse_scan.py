@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+sse_scan = pytest.importorskip("sse_scan", reason="build it with: cythonize -3 -i sse_scan.pyx")
+
+from test_streaming import pop_sse_data_py
+
+# Pieces that exercise prefixes, blanks, CRs and non-data fields
+PIECES = [b"data:", b"data: ", b"data:\t", b"dat", b"event: x", b": comment", b"id: 1",
+          b'{"type":"content","content":"hi"}', b"[DONE]", b" ", b"\t", b"\r", b"\n", b"\n\n",
+          b"\r\n", b"data", b"x", b"\xc3\xa9"]
+
+
+def random_stream(rng):
+    return b"".join(rng.choice(PIECES) for _ in range(rng.randint(0, 60)))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_scan_matches_regex_scanner(seed):
+    rng = random.Random(seed)
+    stream = random_stream(rng)
+
+    # Feed both scanners the same randomly split chunks
+    native_buf, py_buf = bytearray(), bytearray()
+    position = 0
+    while position < len(stream):
+        end = position + rng.randint(1, 16)
+        native_buf.extend(stream[position:end])
+        py_buf.extend(stream[position:end])
+        position = end
+
+        assert sse_scan.scan(native_buf) == pop_sse_data_py(py_buf)
+        assert native_buf == py_buf
+
+
+def test_scan_sse_frames():
+    buf = bytearray(b'data: {"a":1}\r\n\ndata:[DONE]\n\ndata: par')
+
+    assert sse_scan.scan(buf) == [b'{"a":1}', b"[DONE]"]
+    assert buf == b"data: par"